@@ -17,153 +17,517 @@ Original implementation by Frederike Reppekus for ProSi calendar sync
 
 import caldav
 import datetime
-import pytz
+import hashlib
 from icalendar import Calendar
 import logging
 import json
-from collections import defaultdict
+import re
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+UTC = datetime.timezone.utc
+
+# Number of event titles named in the log line of a batch
+LOG_BATCH_PREVIEW = 5
+
+# The fields of a VEVENT needed for grouping, matching and deduplication
+EventMeta = namedtuple(
+    'EventMeta', ['uid', 'summary', 'dtstart', 'rid', 'sequence', 'modified']
+)
+
+# A content line, split into name, parameters and value. Parameter values may be
+# quoted, and quoted values may contain ':' and ';'
+_PROPERTY_RE = re.compile(
+    r'^([A-Za-z0-9-]+)((?:;(?:[^:;"\r\n]|"[^"\r\n]*")*)*):(.*?)\r?$', re.M
+)
+# Properties read into EventMeta, and those whose value must be a plain DATE-TIME
+_META_PROPS = {'UID', 'SUMMARY', 'DTSTART', 'RECURRENCE-ID', 'SEQUENCE', 'LAST-MODIFIED'}
+_DATETIME_PROPS = {'DTSTART', 'RECURRENCE-ID', 'LAST-MODIFIED'}
+
+# Characters ignored when comparing summaries for near-duplicates
+_ZERO_WIDTH_RE = re.compile('[\u200b\u200c\u200d\u2060\ufeff]')
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+
+# Copies of an instance whose starts are further apart are never merged
+MAX_DUPLICATE_SPAN = datetime.timedelta(days=60)
+
+
+def _parse_ical_datetime(value):
+    """Parse a parameterless DATE-TIME value, returning None if it is not one"""
+    utc = value.endswith('Z')
+    try:
+        dt = datetime.datetime.strptime(value[:-1] if utc else value, '%Y%m%dT%H%M%S')
+    except ValueError:
+        return None
+    return dt.replace(tzinfo=UTC) if utc else dt
+
+
+def _iter_vevent_props(data):
+    """Yield (name, params, value, folded) for the properties of the first VEVENT
+    
+    Properties of nested components such as VALARM are skipped, and reading
+    stops at the END of the VEVENT. folded tells whether the line continues
+    on the next one.
+    """
+    in_vevent = False
+    depth = 0  # nesting level of components inside the VEVENT
+    for match in _PROPERTY_RE.finditer(data):
+        name, params, value = match.groups()
+        name = name.upper()
+        if name == 'BEGIN':
+            if in_vevent:
+                depth += 1
+            elif value.upper() == 'VEVENT':
+                in_vevent = True
+        elif not in_vevent:
+            continue
+        elif name == 'END':
+            if not depth:
+                return
+            depth -= 1
+        elif not depth:
+            end = match.end()
+            yield name, params, value, data[end + 1:end + 2] in (' ', '\t')
+
+
+def _extract_event_meta(data):
+    """Read EventMeta from raw iCal data in a single pass over its lines
+    
+    Returns None whenever the data is not simple enough to be read this way
+    (several VEVENTs, folded or escaped values, parameters on DTSTART or
+    RECURRENCE-ID), in which case the data must be fully parsed instead.
+    """
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+    if data.count('BEGIN:VEVENT') != 1:
+        return None
+    
+    props = {}
+    for name, params, value, folded in _iter_vevent_props(data):
+        if name not in _META_PROPS:
+            continue
+        if folded or '\\' in value or (params and name in _DATETIME_PROPS):
+            return None
+        props[name] = value
+    
+    if 'UID' not in props or 'DTSTART' not in props:
+        return None
+    dtstart = _parse_ical_datetime(props['DTSTART'])
+    if dtstart is None:
+        return None
+    
+    rid = None
+    if 'RECURRENCE-ID' in props:
+        rid = _parse_ical_datetime(props['RECURRENCE-ID'])
+        if rid is None:
+            return None
+    
+    modified = None
+    if 'LAST-MODIFIED' in props:
+        modified = _parse_ical_datetime(props['LAST-MODIFIED'])
+        if modified is None:
+            return None
+    
+    sequence = props.get('SEQUENCE', '0')
+    if not sequence.isdigit():
+        return None
+    return EventMeta(
+        uid=props['UID'],
+        summary=props.get('SUMMARY', ''),
+        dtstart=dtstart,
+        rid=rid,
+        sequence=int(sequence),
+        modified=modified,
+    )
+
+
+def _normalize_summary(summary):
+    """Casefold summary and drop zero-width characters, punctuation and extra whitespace"""
+    summary = _ZERO_WIDTH_RE.sub('', summary).casefold()
+    return ' '.join(_PUNCTUATION_RE.sub('', summary).split())
+
+
+def _dedupe_key(summary, dt):
+    """Hash normalized summary and start into a compact key for duplicate detection"""
+    # Aware datetimes are keyed by their instant, so equal starts in any zone match
+    if isinstance(dt, datetime.datetime) and dt.tzinfo is not None:
+        dt = dt.astimezone(UTC)
+    value = f"{_normalize_summary(summary)}|{dt.isoformat() if dt else ''}"
+    return hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest()
+
+
+def _within_duplicate_span(dt1, dt2):
+    """Check whether two start values are close enough to be copies of one instance"""
+    if dt1 is None or dt2 is None:
+        return True
+    # Compare by date, so that dates and (aware or naive) datetimes can be mixed
+    d1 = dt1.date() if isinstance(dt1, datetime.datetime) else dt1
+    d2 = dt2.date() if isinstance(dt2, datetime.datetime) else dt2
+    return abs(d1 - d2) <= MAX_DUPLICATE_SPAN
+
+
+def _meta_from_component(component):
+    """Build EventMeta from a parsed VEVENT component"""
+    dtstart = component.get('dtstart')
+    rid = component.get('recurrence-id')
+    modified = component.get('last-modified')
+    return EventMeta(
+        uid=str(component.get('uid', '')),
+        summary=str(component.get('summary', '')),
+        dtstart=dtstart.dt if dtstart else None,
+        rid=rid.dt if rid else None,
+        sequence=int(component.get('sequence', 0) or 0),
+        modified=modified.dt if modified else None,
+    )
+
+
+def _is_newer(sequence, modified, other_sequence, other_modified):
+    """Check whether a revision is newer than another by SEQUENCE, then LAST-MODIFIED
+    
+    Many clients do not bump SEQUENCE for edits such as a rename, so equal
+    sequence numbers are told apart by LAST-MODIFIED when both sides have it.
+    """
+    if sequence != other_sequence:
+        return sequence > other_sequence
+    if modified is None or other_modified is None:
+        return False
+    try:
+        return modified > other_modified
+    except TypeError:
+        # LAST-MODIFIED must be UTC, but do not fail on a floating value
+        return False
+
 class CalendarSync:
-    def __init__(self, source_calendar, target_calendar):
+    def __init__(self, source_calendar, target_calendar, max_concurrent_requests=8,
+                 window_past=30, window_future=90):
         self.source_calendar = source_calendar
         self.target_calendar = target_calendar
+        # Sync window in days before and after now
+        self.window_past = window_past
+        self.window_future = window_future
+        # Upper bound on parallel requests against a single server
+        self.max_concurrent_requests = max_concurrent_requests
         
+    def _search_window(self):
+        """Return the (start, end) datetimes of the sync window"""
+        now = datetime.datetime.now(UTC)
+        start = now - datetime.timedelta(days=self.window_past)
+        end = now + datetime.timedelta(days=self.window_future)
+        return start, end
+    
     def sync(self):
-        # First clean up duplicates
-        self._cleanup_duplicates(self.target_calendar)
+        start, end = self._search_window()
         
-        # Then do the normal sync
-        now = datetime.datetime.now(pytz.UTC)
-        start = now - datetime.timedelta(days=30)
-        end = now + datetime.timedelta(days=90)
+        # The calendars live on different servers, so fetch them concurrently
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            source_future = executor.submit(
+                self.source_calendar.date_search, start=start, end=end
+            )
+            target_future = executor.submit(
+                self.target_calendar.date_search, start=start, end=end
+            )
+            source_events = source_future.result()
+            target_events = target_future.result()
         
-        source_events = self.source_calendar.date_search(start=start, end=end)
-        target_events = self.target_calendar.date_search(start=start, end=end)
+        # First clean up duplicates, reusing the events we just fetched
+        fetched_count = len(target_events)
+        target_events = self._cleanup_duplicates(self.target_calendar, target_events)
+        duplicates_removed = fetched_count - len(target_events)
         
+        # Then do the normal sync
         # Group events by UID
-        source_by_uid = self._group_events_by_uid(source_events)
-        target_by_uid = self._group_events_by_uid(target_events)
+        source_table, source_by_uid = self._group_events_by_uid(source_events)
+        target_table, target_by_uid = self._group_events_by_uid(target_events)
+        
+        source_uids = source_by_uid.keys()
+        target_uids = target_by_uid.keys()
+        new_uids = source_uids - target_uids
+        stale_uids = target_uids - source_uids
         
-        # Sync each UID group
-        for uid, source_instances in source_by_uid.items():
-            target_instances = target_by_uid.get(uid, [])
-            self._sync_instances(source_instances, target_instances)
+        # Sync each UID group, fully new UIDs have nothing to match against
+        to_create = []
+        to_update = []
+        for uid, source_indices in source_by_uid.items():
+            target_indices = [] if uid in new_uids else target_by_uid[uid]
+            created, updated = self._sync_instances(
+                source_table, source_indices, target_table, target_indices
+            )
+            to_create.extend(created)
+            to_update.extend(updated)
+        
+        # Save the new and changed instances of all groups in one batch, the PUTs are
+        # independent and share the target client's keep-alive connections
+        self._log_batch("Creating new instances", [summary for summary, _ in to_create])
+        created = self._run_concurrently(lambda item: self._create_event(*item), to_create)
+        self._log_batch("Updating changed instances", [item[0] for item in to_update])
+        updated = self._run_concurrently(lambda item: self._update_event(*item), to_update)
             
         # Handle deletions - remove events in target that no longer exist in source
-        for uid, target_instances in target_by_uid.items():
-            if uid not in source_by_uid:
-                for event, comp in target_instances:
-                    summary = str(comp.get('summary', ''))
-                    logger.info(f"Deleting event no longer in source: {summary}")
-                    try:
-                        event.delete()
-                    except Exception as e:
-                        logger.error(f"Error deleting event {summary}: {str(e)}")
-    
-    def _cleanup_duplicates(self, calendar):
-        """Remove duplicate events from calendar"""
+        to_delete = []
+        for uid in stale_uids:
+            for i in target_by_uid[uid]:
+                to_delete.append((target_table['event'][i], target_table['summary'][i]))
+        self._log_batch(
+            "Deleting events no longer in source", [summary for _, summary in to_delete]
+        )
+        deleted = self._run_concurrently(lambda item: self._safe_delete(*item), to_delete)
+        
+        logger.info(
+            "sync: created=%d updated=%d deleted=%d dups=%d",
+            sum(created), sum(updated), sum(deleted), duplicates_removed
+        )
+    
+    def _cleanup_duplicates(self, calendar, events=None):
+        """Remove duplicate events from calendar and return the remaining events
+        
+        If events is given, it is used instead of fetching the calendar again.
+        """
         logger.info("Cleaning up duplicates...")
         
         # Get all events
-        now = datetime.datetime.now(pytz.UTC)
-        start = now - datetime.timedelta(days=30)
-        end = now + datetime.timedelta(days=90)
-        events = calendar.date_search(start=start, end=end)
+        if events is None:
+            start, end = self._search_window()
+            events = calendar.date_search(start=start, end=end)
         
-        # Group events by UID
-        by_uid = self._group_events_by_uid(events)
+        # Collect the VEVENTs of all events, duplicates are found across UIDs at once
+        table, _ = self._group_events_by_uid(events)
+        summaries, dtstarts = table['summary'], table['dtstart']
         
-        # For each UID group, find and remove duplicates
-        for uid, instances in by_uid.items():
-            seen = {}  # (summary, full_datetime) -> event
-            duplicates = []
-            
-            for event, comp in instances:
-                # Get the full datetime (not just time)
-                dt = comp.get('dtstart').dt
-                
-                key = (
-                    str(comp.get('summary', '')).strip(),
-                    dt  # This is now the full datetime object
-                )
-                
-                if key in seen:
-                    # Keep the older event (lower sequence number)
-                    existing_event, existing_comp = seen[key]
-                    existing_seq = int(existing_comp.get('sequence', 0) or 0)
-                    current_seq = int(comp.get('sequence', 0) or 0)
-                    
-                    if current_seq > existing_seq:
-                        duplicates.append(existing_event)
-                        seen[key] = (event, comp)
-                    else:
-                        duplicates.append(event)
-                else:
-                    seen[key] = (event, comp)
-            
-            # Delete duplicates
-            for event in duplicates:
-                try:
-                    summary = str(Calendar.from_ical(event.data).walk('VEVENT').__next__().get('summary', ''))
-                    dt = Calendar.from_ical(event.data).walk('VEVENT').__next__().get('dtstart').dt
-                    logger.info(f"Removing duplicate: {summary} on {dt}")
-                    event.delete()
-                except Exception as e:
-                    logger.error(f"Error deleting duplicate: {str(e)}")
+        # Hash (normalized summary, full datetime) once per instance, not just the time
+        keys = [_dedupe_key(summary, dt) for summary, dt in zip(summaries, dtstarts)]
+        
+        # Find the duplicate events and delete them
+        to_delete = []
+        for i in self._find_duplicates(table, keys):
+            to_delete.append((table['event'][i], f"{summaries[i]} on {dtstarts[i]}"))
+        self._log_batch("Removing duplicates", [description for _, description in to_delete])
+        deleted = self._run_concurrently(lambda item: self._safe_delete(*item), to_delete)
+        
+        # Events whose deletion failed are still in the calendar
+        removed = {id(item[0]) for item, ok in zip(to_delete, deleted) if ok}
+        return [event for event in events if id(event) not in removed]
+    
+    def _find_duplicates(self, table, keys):
+        """Return one VEVENT index for each duplicate event to delete
+        
+        Two instances are linked when they share a UID and either a dedupe key
+        (normalized summary and start) or a recurrence-id, as long as their
+        starts are within MAX_DUPLICATE_SPAN. Deleting removes a whole event
+        with all its VEVENTs, so union-find merges events rather than
+        instances: linked instances put their events into one group. Each
+        group keeps the event with the highest sequence number among its
+        VEVENTs, or the first one on ties.
+        """
+        events, uids, dtstarts, rids, sequences = (
+            table['event'], table['uid'], table['dtstart'], table['rid'], table['seq']
+        )
+        parent = {}  # id(event) -> id(parent event)
+        first_index = {}  # id(event) -> index of its first VEVENT
+        max_sequence = {}  # id(event) -> highest sequence number of its VEVENTs
+        for i, event in enumerate(events):
+            parent.setdefault(id(event), id(event))
+            first_index.setdefault(id(event), i)
+            max_sequence[id(event)] = max(
+                max_sequence.get(id(event), sequences[i]), sequences[i]
+            )
+        
+        def find(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+        
+        first_with = {}  # (uid, dedupe key or recurrence-id) -> first index having it
+        for i in range(len(events)):
+            for key in (('key', uids[i], keys[i]), ('rid', uids[i], rids[i])):
+                if key[2] is None:
+                    continue
+                j = first_with.setdefault(key, i)
+                if j != i and _within_duplicate_span(dtstarts[i], dtstarts[j]):
+                    parent[find(id(events[i]))] = find(id(events[j]))
+        
+        groups = defaultdict(list)
+        for event_id in first_index:
+            groups[find(event_id)].append(event_id)
+        
+        duplicates = []
+        for members in groups.values():
+            if len(members) > 1:
+                keep = max(members, key=lambda event_id: max_sequence[event_id])
+                duplicates.extend(first_index[m] for m in members if m != keep)
+        return duplicates
+    
+    def _log_batch(self, action, descriptions):
+        """Log a single line for a batch of operations, naming the first few events"""
+        if not descriptions or not logger.isEnabledFor(logging.INFO):
+            return
+        preview = ', '.join(descriptions[:LOG_BATCH_PREVIEW])
+        remaining = len(descriptions) - LOG_BATCH_PREVIEW
+        if remaining > 0:
+            preview += f" and {remaining} more"
+        logger.info("%s (%d): %s", action, len(descriptions), preview)
+    
+    def _safe_delete(self, event, description):
+        """Delete an event, logging instead of raising on failure"""
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Deleting: {description}")
+        try:
+            event.delete()
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting {description}: {str(e)}")
+            return False
+    
+    def _parse_event(self, event):
+        """Parse the event's iCal data, memoizing the result on the event"""
+        cal = getattr(event, '_parsed_cal', None)
+        if cal is None:
+            cal = Calendar.from_ical(event.data)
+            event._parsed_cal = cal
+        return cal
+    
+    def _event_meta(self, event):
+        """Return the EventMeta of every VEVENT in the event, memoized on the event"""
+        metas = getattr(event, '_meta', None)
+        if metas is None:
+            meta = _extract_event_meta(event.data)
+            if meta is not None:
+                metas = [meta]
+            else:
+                cal = self._parse_event(event)
+                metas = [_meta_from_component(component) for component in cal.walk('VEVENT')]
+            event._meta = metas
+        return metas
     
     def _group_events_by_uid(self, events):
+        """Group the VEVENTs of events by UID
+        
+        Returns (table, grouped). The table stores one flat list per field
+        ('uid', 'summary', 'dtstart', 'rid', 'seq', 'modified', 'event'), with
+        one entry per VEVENT; grouped maps each UID to the indices of its VEVENTs.
+        """
+        fields = ('uid', 'summary', 'dtstart', 'rid', 'seq', 'modified', 'event')
+        table = {field: [] for field in fields}
         grouped = defaultdict(list)
         for event in events:
-            cal = Calendar.from_ical(event.data)
-            for component in cal.walk('VEVENT'):
-                uid = str(component.get('uid', ''))
-                if uid:
-                    grouped[uid].append((event, component))
-        return grouped
-    
-    def _event_exists(self, source_comp, target_instances):
-        """Check if an event already exists in target calendar"""
-        source_rid = source_comp.get('recurrence-id')
-        source_start = source_comp.get('dtstart').dt
-        source_summary = str(source_comp.get('summary', ''))
-        
-        for _, target_comp in target_instances:
-            # If both events have recurrence-id, compare those
-            if source_rid and target_comp.get('recurrence-id'):
-                if str(source_rid.dt) == str(target_comp.get('recurrence-id').dt):
-                    return True
-            # For non-recurring events, compare start time and summary
-            else:
-                target_start = target_comp.get('dtstart').dt
-                target_summary = str(target_comp.get('summary', ''))
-                if (source_start == target_start and 
-                    source_summary.strip() == target_summary.strip()):
-                    return True
-        return False
+            for meta in self._event_meta(event):
+                if meta.uid:
+                    grouped[meta.uid].append(len(table['event']))
+                    table['uid'].append(meta.uid)
+                    table['summary'].append(meta.summary)
+                    table['dtstart'].append(meta.dtstart)
+                    table['rid'].append(meta.rid)
+                    table['seq'].append(meta.sequence)
+                    table['modified'].append(meta.modified)
+                    table['event'].append(event)
+        return table, grouped
+    
+    def _instance_key(self, table, i):
+        """Return the (uid, recurrence-id or start) pair identifying an instance"""
+        rid = table['rid'][i]
+        return (table['uid'][i], rid if rid else table['dtstart'][i])
+    
+    def _index_instances(self, table, indices):
+        """Index target instances by instance key for O(1) matching"""
+        return {self._instance_key(table, i): i for i in indices}
     
-    def _sync_instances(self, source_instances, target_instances):
+    def _find_instance(self, table, i, target_index):
+        """Return the target index of the instance at index i, or None if it is missing"""
+        return target_index.get(self._instance_key(table, i))
+    
+    def _run_concurrently(self, func, items):
+        """Call func on each item, keeping at most max_concurrent_requests in flight"""
+        items = list(items)
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as executor:
+            return list(executor.map(func, items))
+    
+    def _create_event(self, summary, ical_data):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Creating new instance: {summary}")
+        try:
+            # Create new event using save_event
+            self.target_calendar.save_event(
+                ical=ical_data
+            )
+            return True
+        except Exception as e:
+            logger.error(f"Error creating event {summary}: {str(e)}")
+            return False
+    
+    def _update_event(self, summary, event, ical_data):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Updating changed instance: {summary}")
+        try:
+            # Overwrite the existing resource in place with a plain PUT. event.save()
+            # is not used: caldav >= 1.0 bumps SEQUENCE on save and merges recurrence
+            # instances into their master instead of writing the data as is.
+            body = ical_data.encode('utf-8') if isinstance(ical_data, str) else ical_data
+            response = event.client.put(
+                str(event.url), body, {'Content-Type': 'text/calendar; charset="utf-8"'}
+            )
+            if response.status not in (200, 201, 204):
+                raise Exception(f"PUT to {event.url} returned status {response.status}")
+            event._parsed_cal = None
+            event._meta = None
+            return True
+        except Exception as e:
+            logger.error(f"Error updating event {summary}: {str(e)}")
+            return False
+    
+    def _sync_instances(self, source_table, source_indices, target_table, target_indices):
+        """Compare source instances against the target instances of the same UID
+        
+        Returns (to_create, to_update): the (summary, ical_data) of source events
+        whose UID has no instance in target, and the (summary, target_event,
+        ical_data) of target events to overwrite because their source event has
+        missing or newer instances. A source event whose instances all miss the
+        index, e.g. a rescheduled single event, overwrites the target event
+        holding its UID rather than creating a second one. Each source and
+        target event is queued at most once, since every PUT writes the whole
+        event with all its instances.
+        """
+        target_index = (
+            self._index_instances(target_table, target_indices) if target_indices else {}
+        )
+        changed = {}  # id(source event) -> (summary, source event) needing a PUT
+        matched = {}  # id(source event) -> target event holding one of its instances
+        
         # Process each source instance
-        for source_event, source_comp in source_instances:
-            summary = str(source_comp.get('summary', ''))
+        for i in source_indices:
+            summary = source_table['summary'][i]
+            source_event = source_table['event'][i]
             
-            if self._event_exists(source_comp, target_instances):
-                logger.info(f"Instance exists: {summary}")
-                continue
-                
-            logger.info(f"Creating new instance: {summary}")
-            try:
-                # Get the raw iCal data and ensure it's a string
-                ical_data = source_event.data
-                if isinstance(ical_data, bytes):
-                    ical_data = ical_data.decode('utf-8')
-                    
-                # Create new event using save_event
-                self.target_calendar.save_event(
-                    ical=ical_data
-                )
-            except Exception as e:
-                logger.error(f"Error creating event {summary}: {str(e)}") 
\ No newline at end of file
+            target_i = self._find_instance(source_table, i, target_index)
+            if target_i is not None:
+                matched.setdefault(id(source_event), target_table['event'][target_i])
+                # Unchanged instances are skipped, avoiding a redundant PUT
+                if not _is_newer(
+                    source_table['seq'][i], source_table['modified'][i],
+                    target_table['seq'][target_i], target_table['modified'][target_i],
+                ):
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(f"Instance exists: {summary}")
+                    continue
+            changed.setdefault(id(source_event), (summary, source_event))
+        
+        # Target event to fall back to when none of a source event's instances match
+        uid_event = target_table['event'][target_indices[0]] if target_indices else None
+        
+        to_create = []
+        to_update = []
+        updated_events = set()  # ids of target events already queued for update
+        for source_id, (summary, source_event) in changed.items():
+            # Pass the raw iCal data on as is, caldav encodes str and bytes for the wire
+            ical_data = source_event.data
+            target_event = matched.get(source_id, uid_event)
+            if target_event is None:
+                to_create.append((summary, ical_data))
+            elif id(target_event) not in updated_events:
+                updated_events.add(id(target_event))
+                to_update.append((summary, target_event, ical_data))
+        
+        return to_create, to_update
@@ -2,8 +2,10 @@
 Runner script for CalDAV Instance-Based Calendar Sync
 """
 
+import logging
 import os
 import caldav
+from concurrent.futures import ThreadPoolExecutor
 from caldav_instance_sync import CalendarSync
 from dotenv import load_dotenv
 
@@ -30,15 +32,32 @@ def connect_calendar(url, username, password, calendar_name):
     principal = client.principal()
     calendars = principal.calendars()
     
-    for calendar in calendars:
-        if calendar.name.lower() == calendar_name.lower():
-            return calendar
-    raise Exception(f"Calendar {calendar_name} not found")
+    # Read each calendar's name once; reversed so the first calendar wins on clashes
+    by_name = {
+        calendar.name.lower(): calendar for calendar in reversed(calendars) if calendar.name
+    }
+    try:
+        return by_name[calendar_name.lower()]
+    except KeyError:
+        raise Exception(f"Calendar {calendar_name} not found") from None
 
 def main():
-    # Connect to calendars
-    nextcloud_cal = connect_calendar(nextcloud_url, nextcloud_username, nextcloud_password, nextcloud_calendar_name)
-    kerio_cal = connect_calendar(kerio_url, kerio_username, kerio_password, kerio_calendar_name)
+    logging.basicConfig(level=logging.INFO)
+    
+    # Connect to calendars, concurrently since each does its own discovery round-trips
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        nextcloud_future = executor.submit(
+            connect_calendar,
+            nextcloud_url,
+            nextcloud_username,
+            nextcloud_password,
+            nextcloud_calendar_name,
+        )
+        kerio_future = executor.submit(
+            connect_calendar, kerio_url, kerio_username, kerio_password, kerio_calendar_name
+        )
+        nextcloud_cal = nextcloud_future.result()
+        kerio_cal = kerio_future.result()
     
     # Create sync object and run sync
     sync = CalendarSync(source_calendar=nextcloud_cal, target_calendar=kerio_cal)
@@ -0,0 +1,301 @@
+import pytest
+from caldav_instance_sync import (
+    CalendarSync,
+    _extract_event_meta,
+    _iter_vevent_props,
+    _meta_from_component,
+)
+from icalendar import Calendar
+
+
+def make_ical(*vevents: str) -> str:
+    """Wrap the given VEVENT bodies (lines joined with |) into a VCALENDAR"""
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//syncall//tests//EN",
+        "BEGIN:VTIMEZONE",
+        "TZID:Europe/Berlin",
+        "BEGIN:STANDARD",
+        "DTSTART:19701025T030000",
+        "TZOFFSETFROM:+0200",
+        "TZOFFSETTO:+0100",
+        "END:STANDARD",
+        "END:VTIMEZONE",
+    ]
+    for vevent in vevents:
+        lines.extend(["BEGIN:VEVENT", *vevent.split("|"), "END:VEVENT"])
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(lines) + "\r\n"
+
+
+def parsed_meta(data: str):
+    return [_meta_from_component(comp) for comp in Calendar.from_ical(data).walk("VEVENT")]
+
+
+# Read by the fast path -----------------------------------------------------------------------
+@pytest.mark.parametrize(
+    "data",
+    [
+        make_ical("UID:a|SUMMARY:Meeting|DTSTART:20240105T100000Z"),
+        make_ical("UID:a|SUMMARY:Floating|DTSTART:20240105T100000|SEQUENCE:3"),
+        make_ical(
+            "UID:a|SUMMARY:Override|DTSTART:20240105T110000Z"
+            "|RECURRENCE-ID:20240105T100000Z|SEQUENCE:1"
+        ),
+        make_ical("UID:a|SUMMARY;LANGUAGE=de:Besprechung|DTSTART:20240105T100000Z"),
+        make_ical(
+            "UID:a|SUMMARY:Modified|DTSTART:20240105T100000Z|LAST-MODIFIED:20240101T080000Z"
+        ),
+        make_ical(
+            'UID:a|SUMMARY;ALTREP="http://x.org/y":Team meeting|DTSTART:20240105T100000Z'
+        ),
+        make_ical(
+            "UID:a|SUMMARY:Long description|DTSTART:20240105T100000Z"
+            "|DESCRIPTION:first part| continued"
+        ),
+        make_ical(
+            "UID:a|SUMMARY:With alarm|DTSTART:20240105T100000Z"
+            "|BEGIN:VALARM|UID:alarm|ACTION:DISPLAY|TRIGGER:-PT15M|END:VALARM"
+        ),
+    ],
+)
+def test_extract_event_meta_fast_path(data):
+    meta = _extract_event_meta(data)
+    assert meta is not None
+    assert [meta] == parsed_meta(data)
+    assert _extract_event_meta(data.encode("utf-8")) == meta
+
+
+# Left to the full parser ---------------------------------------------------------------------
+@pytest.mark.parametrize(
+    "data",
+    [
+        make_ical("UID:a|SUMMARY:Folded sum| mary|DTSTART:20240105T100000Z"),
+        make_ical("UID:a|SUMMARY:Escaped\\, comma|DTSTART:20240105T100000Z"),
+        make_ical("UID:a|SUMMARY:All day|DTSTART;VALUE=DATE:20240105"),
+        make_ical(
+            "UID:a|SUMMARY:Zoned modified|DTSTART:20240105T100000Z"
+            "|LAST-MODIFIED;TZID=Europe/Berlin:20240101T080000"
+        ),
+        make_ical("UID:a|SUMMARY:Zoned|DTSTART;TZID=Europe/Berlin:20240105T100000"),
+        make_ical(
+            "UID:a|SUMMARY:Zoned override|DTSTART:20240105T100000Z"
+            "|RECURRENCE-ID;TZID=Europe/Berlin:20240105T110000"
+        ),
+        make_ical(
+            "UID:a|SUMMARY:Master|DTSTART:20240105T100000Z|RRULE:FREQ=WEEKLY",
+            "UID:a|SUMMARY:Override|DTSTART:20240112T110000Z|RECURRENCE-ID:20240112T100000Z",
+        ),
+    ],
+)
+def test_extract_event_meta_falls_back(data):
+    assert _extract_event_meta(data) is None
+    assert parsed_meta(data)
+
+
+def test_iter_vevent_props_skips_nested_components():
+    data = make_ical(
+        "UID:a|DTSTART:20240105T100000Z|BEGIN:VALARM|UID:alarm|END:VALARM|SUMMARY:After alarm",
+    )
+    props = [(name, value) for name, _, value, _ in _iter_vevent_props(data)]
+    assert props == [
+        ("UID", "a"),
+        ("DTSTART", "20240105T100000Z"),
+        ("SUMMARY", "After alarm"),
+    ]
+
+
+# Duplicate cleanup ---------------------------------------------------------------------------
+class FakeResponse:
+    def __init__(self, status: int):
+        self.status = status
+
+
+class FakeClient:
+    def __init__(self):
+        self.puts = {}
+
+    def put(self, url, body, headers=None):
+        self.puts[url] = body
+        return FakeResponse(204)
+
+
+class FakeEvent:
+    count = 0
+
+    def __init__(self, *vevents: str):
+        FakeEvent.count += 1
+        self.url = f"https://caldav.example.org/cal/{FakeEvent.count}.ics"
+        self.client = FakeClient()
+        self.data = make_ical(*vevents)
+        self.deleted = False
+
+    def delete(self):
+        self.deleted = True
+
+    def save(self):
+        # Like caldav >= 1.0: bumps SEQUENCE and only merges this recurrence
+        self.data = self.data.replace("SEQUENCE:", "SEQUENCE:9")
+        raise AssertionError("event.save() does not write the data as is")
+
+    def put_body(self):
+        return self.client.puts.get(self.url)
+
+
+def cleanup(*events: FakeEvent):
+    remaining = CalendarSync(None, None)._cleanup_duplicates(None, list(events))
+    assert remaining == [event for event in events if not event.deleted]
+    return [event for event in events if event.deleted]
+
+
+def test_cleanup_keeps_highest_sequence():
+    first = FakeEvent("UID:a|SUMMARY:Meeting|DTSTART:20240105T100000Z|SEQUENCE:1")
+    second = FakeEvent("UID:a|SUMMARY:Meeting|DTSTART:20240105T100000Z|SEQUENCE:2")
+    third = FakeEvent("UID:a|SUMMARY:Meeting|DTSTART:20240105T100000Z|SEQUENCE:2")
+    assert cleanup(first, second, third) == [first, third]
+
+
+def test_cleanup_ignores_different_uids_and_starts():
+    events = [
+        FakeEvent("UID:a|SUMMARY:Meeting|DTSTART:20240105T100000Z"),
+        FakeEvent("UID:b|SUMMARY:Meeting|DTSTART:20240105T100000Z"),
+        FakeEvent("UID:a|SUMMARY:Meeting|DTSTART:20240105T110000Z"),
+    ]
+    assert cleanup(*events) == []
+
+
+def test_cleanup_normalizes_summaries():
+    first = FakeEvent("UID:a|SUMMARY:Team Meeting|DTSTART:20240105T100000Z")
+    second = FakeEvent("UID:a|SUMMARY:team  meeting\u200b!|DTSTART:20240105T100000Z")
+    other = FakeEvent("UID:a|SUMMARY:Other|DTSTART:20240105T100000Z")
+    assert cleanup(first, second, other) == [second]
+
+
+def test_cleanup_compares_aware_starts_as_instants():
+    utc = FakeEvent("UID:a|SUMMARY:Meeting|DTSTART:20240105T090000Z")
+    berlin = FakeEvent("UID:a|SUMMARY:Meeting|DTSTART;TZID=Europe/Berlin:20240105T100000")
+    assert cleanup(utc, berlin) == [berlin]
+
+
+def test_cleanup_merges_copies_of_an_instance_via_recurrence_id():
+    first = FakeEvent(
+        "UID:s|SUMMARY:Old title|DTSTART:20240107T100000Z|RECURRENCE-ID:20240107T100000Z"
+    )
+    moved = FakeEvent(
+        "UID:s|SUMMARY:New title|DTSTART:20240108T100000Z|RECURRENCE-ID:20240107T100000Z"
+        "|SEQUENCE:1"
+    )
+    assert cleanup(first, moved) == [first]
+
+
+def test_cleanup_does_not_merge_beyond_duplicate_span():
+    first = FakeEvent(
+        "UID:s|SUMMARY:Series|DTSTART:20240107T100000Z|RECURRENCE-ID:20240107T100000Z"
+    )
+    far = FakeEvent(
+        "UID:s|SUMMARY:Series|DTSTART:20241107T100000Z|RECURRENCE-ID:20240107T100000Z"
+    )
+    assert cleanup(first, far) == []
+
+
+def test_cleanup_decides_per_event_not_per_vevent():
+    # Each VEVENT group alone would keep a different event, but only one may survive
+    master = "UID:s|SUMMARY:Series|DTSTART:20240105T100000Z|RRULE:FREQ=WEEKLY"
+    override = (
+        "UID:s|SUMMARY:Series|DTSTART:20240112T110000Z|RECURRENCE-ID:20240112T100000Z"
+    )
+    older = FakeEvent(master + "|SEQUENCE:0", override + "|SEQUENCE:1")
+    newer = FakeEvent(master + "|SEQUENCE:0", override + "|SEQUENCE:2")
+    assert cleanup(older, newer) == [older]
+
+
+# Sync ----------------------------------------------------------------------------------------
+class FakeCalendar:
+    def __init__(self, *events: FakeEvent):
+        self.events = list(events)
+        self.saved = []
+
+    def date_search(self, start, end):
+        return list(self.events)
+
+    def save_event(self, ical):
+        self.saved.append(ical)
+
+
+SERIES_MASTER = "UID:s|SUMMARY:Series|DTSTART:20240105T100000Z|RRULE:FREQ=WEEKLY"
+SERIES_OVERRIDE = (
+    "UID:s|SUMMARY:Series|DTSTART:20240112T110000Z|RECURRENCE-ID:20240112T100000Z"
+)
+
+
+def test_sync_creates_each_source_event_once():
+    source = FakeCalendar(FakeEvent(SERIES_MASTER, SERIES_OVERRIDE))
+    target = FakeCalendar()
+    CalendarSync(source, target).sync()
+    assert target.saved == [source.events[0].data]
+
+
+def test_sync_updates_target_event_with_missing_instances():
+    source = FakeCalendar(FakeEvent(SERIES_MASTER, SERIES_OVERRIDE))
+    existing = FakeEvent(SERIES_MASTER)
+    target = FakeCalendar(existing)
+    CalendarSync(source, target).sync()
+    assert target.saved == []
+    assert existing.put_body() == source.events[0].data.encode("utf-8")
+
+
+def test_sync_updates_newer_sequence_with_source_data_as_is():
+    source = FakeCalendar(FakeEvent("UID:a|SUMMARY:Moved|DTSTART:20240105T100000Z|SEQUENCE:2"))
+    existing = FakeEvent("UID:a|SUMMARY:Meeting|DTSTART:20240105T100000Z|SEQUENCE:1")
+    target = FakeCalendar(existing)
+    CalendarSync(source, target).sync()
+    assert target.saved == []
+    assert existing.put_body() == source.events[0].data.encode("utf-8")
+
+
+def test_sync_updates_rescheduled_event_in_place():
+    source = FakeCalendar(
+        FakeEvent("UID:a|SUMMARY:Meeting|DTSTART:20240106T100000Z|SEQUENCE:1")
+    )
+    existing = FakeEvent("UID:a|SUMMARY:Meeting|DTSTART:20240105T100000Z")
+    target = FakeCalendar(existing)
+    CalendarSync(source, target).sync()
+    assert target.saved == []
+    assert not existing.deleted
+    assert existing.put_body() == source.events[0].data.encode("utf-8")
+
+
+def test_sync_skips_unchanged_event():
+    data = "UID:a|SUMMARY:Meeting|DTSTART:20240105T100000Z|SEQUENCE:1"
+    source = FakeCalendar(FakeEvent(data + "|LAST-MODIFIED:20240101T080000Z"))
+    existing = FakeEvent(data + "|LAST-MODIFIED:20240101T080000Z")
+    older = FakeEvent(
+        "UID:b|SUMMARY:Other|DTSTART:20240105T100000Z|SEQUENCE:1"
+        "|LAST-MODIFIED:20240101T080000Z"
+    )
+    newer = FakeEvent(
+        "UID:b|SUMMARY:Other|DTSTART:20240105T100000Z|SEQUENCE:2"
+        "|LAST-MODIFIED:20231201T080000Z"
+    )
+    source.events.append(older)
+    target = FakeCalendar(existing, newer)
+    CalendarSync(source, target).sync()
+    assert target.saved == []
+    assert existing.put_body() is None
+    assert newer.put_body() is None
+
+
+def test_sync_updates_newer_last_modified_with_same_sequence():
+    source = FakeCalendar(
+        FakeEvent(
+            "UID:a|SUMMARY:Renamed|DTSTART:20240105T100000Z|LAST-MODIFIED:20240102T080000Z"
+        )
+    )
+    existing = FakeEvent(
+        "UID:a|SUMMARY:Meeting|DTSTART:20240105T100000Z|LAST-MODIFIED:20240101T080000Z"
+    )
+    target = FakeCalendar(existing)
+    CalendarSync(source, target).sync()
+    assert target.saved == []
+    assert existing.put_body() == source.events[0].data.encode("utf-8")